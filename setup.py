@@ -12,8 +12,8 @@ setup(name='tap-gitlab',
       install_requires=[
           'singer-python==5.9.1',
           'requests==2.31.0',
-          'strict-rfc3339==0.7',
-          'backoff==1.8.0'
+          'backoff==1.8.0',
+          'orjson>=3.8,<4'
       ],
       entry_points='''
           [console_scripts]
@@ -1,21 +1,37 @@
 #!/usr/bin/env python3
 
+import collections
+import copy
 import datetime
+import functools
+import io
 import sys
 import os
+import time
 import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import orjson
+from urllib.parse import parse_qs, quote, urlparse
 import requests
+from requests.adapters import DEFAULT_POOLSIZE, HTTPAdapter
 import singer
+import singer.messages
 from singer import Transformer, utils, metadata
 from singer.catalog import Catalog, CatalogEntry
 from singer.schema import Schema
 
-import pytz
 import backoff
-from strict_rfc3339 import rfc3339_to_timestamp
 from dateutil.parser import isoparse
 
 PER_PAGE_MAX = 100
+# (connect, read) timeouts in seconds for every request made to the GitLab API
+REQUEST_TIMEOUT = (3.05, 300)
+# Records are written to a buffered stdout that is only flushed when it fills
+#  up or on STATE messages, so the target reads large chunks at a time
+STDOUT_BUFFER_SIZE = 1024 * 1024
+# How many times a rate limited (HTTP 429) request is retried
+RATE_LIMIT_MAX_RETRIES = 10
 CONFIG = {
     'api_url': "https://gitlab.com/api/v4",
     'private_token': None,
@@ -26,21 +42,42 @@ CONFIG = {
     'fetch_pipelines_extended': False,
     'fetch_group_variables': False,
     'fetch_project_variables': False,
+    'page_concurrency': 1,
+    'stream_concurrency': 1,
+    'project_concurrency': 1,
+    'labels_per_page': 20,
+    'requests_per_minute': None,
 }
 STATE = {}
 CATALOG = None
-
+# Metadata map of every selected stream, keyed by tap_stream_id
+SELECTED_STREAMS = {}
+STDOUT = None
+# Ids of the users already written, as the same user is returned for every
+#  project and group they are a member of
+EMITTED_USERS = set()
+EMITTED_USERS_LOCK = threading.Lock()
+# Per thread copies of the stream schemas, see get_schema
+THREAD_SCHEMAS = threading.local()
+
+# The same state and start_date values are compared again for every project
+@functools.lru_cache(maxsize=1024)
 def parse_datetime(datetime_str):
     dt = isoparse(datetime_str)
     if not dt.tzinfo:
-        dt = dt.replace(tzinfo=pytz.UTC)
+        dt = dt.replace(tzinfo=datetime.timezone.utc)
     return dt
 
 def get_abs_path(path):
     return os.path.join(os.path.dirname(os.path.realpath(__file__)), path)
 
+# Some schema files are shared by several streams (e.g. users, milestones),
+#  so every file is only read and parsed once. The parsed schemas are never
+#  transformed against directly, see get_schema
+@functools.lru_cache(maxsize=None)
 def load_schema(entity):
-    return utils.load_json(get_abs_path("schemas/{}.json".format(entity)))
+    with open(get_abs_path("schemas/{}.json".format(entity)), 'rb') as schema_file:
+        return orjson.loads(schema_file.read())
 
 RESOURCES = {
     'projects': {
@@ -112,6 +149,7 @@ RESOURCES = {
         'schema': load_schema('users'),
         'key_properties': ['id'],
         'replication_method': 'FULL_TABLE',
+        'keyset_pagination': True,
     },
     'groups': {
         'url': '/groups/{id}',
@@ -218,7 +256,15 @@ STREAM_CONFIG_SWITCHES = (
 LOGGER = singer.get_logger()
 SESSION = requests.Session()
 
-TRUTHY = ("true", "1", "yes", "on")
+TRUTHY = frozenset(("true", "1", "yes", "on"))
+
+# RFC 3339 date-times in UTC, the format the GitLab API returns them in
+UTC_DATETIME_REGEX = re.compile(r'^(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2})(?:\.(\d{1,6}))?(?:Z|[+-]00:00)$')
+
+# Meant to mark site_users unsupported on gitlab.com during discovery, but an
+#  api_url starts with its scheme (https://gitlab.com), so this has never
+#  matched. Kept as it is so existing catalogs do not change
+GITLAB_COM_REGEX = re.compile(r'^gitlab.com')
 
 class ResourceInaccessible(Exception):
     """
@@ -226,28 +272,172 @@ class ResourceInaccessible(Exception):
     e.g. Unauthorized, Forbidden, Not Found errors
     """
 
+class PageConcurrency:
+    """
+    Number of pages that may be requested concurrently, adjusted with
+    additive increase / multiplicative decrease: it is halved whenever the
+    GitLab API rate limits a request and grows back by one for every window
+    of successful requests, up to the `page_concurrency` setting.
+    """
+
+    def __init__(self, maximum):
+        self.lock = threading.Lock()
+        self.reset(maximum)
+
+    @property
+    def limit(self) -> int:
+        return int(self.value)
+
+    def reset(self, maximum):
+        self.maximum = maximum
+        self.value = float(maximum)
+
+    def increase(self):
+        with self.lock:
+            self.value = min(self.value + 1 / self.value, self.maximum)
+
+    def decrease(self):
+        with self.lock:
+            previous = self.limit
+            self.value = max(self.value / 2, 1.0)
+        if self.limit != previous:
+            LOGGER.info("Lowering page concurrency to {}".format(self.limit))
+
+PAGE_CONCURRENCY = PageConcurrency(CONFIG['page_concurrency'])
+
+class RateLimiter:
+    """
+    Token bucket shared by every thread making requests to the GitLab API,
+    spacing them out to the `requests_per_minute` setting (no limit when it
+    is unset). When GitLab rate limits a request anyway, every thread holds
+    off until the rate limit window resets instead of piling up more 429s.
+    """
+
+    def __init__(self, requests_per_minute):
+        self.lock = threading.Lock()
+        self.reset(requests_per_minute)
+
+    def reset(self, requests_per_minute):
+        self.rate = requests_per_minute / 60 if requests_per_minute else None
+        # Allow bursts of up to a second worth of requests
+        self.capacity = max(self.rate or 0, 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+
+    def pause(self, seconds):
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def acquire(self):
+        with self.lock:
+            now = time.monotonic()
+            wait = self.paused_until - now
+            if self.rate:
+                self.tokens = min(self.tokens + (now - self.updated) * self.rate, self.capacity)
+                self.updated = now
+                # A missing token is reserved ahead, to be waited for below
+                self.tokens -= 1
+                if self.tokens < 0:
+                    wait = max(wait, -self.tokens / self.rate)
+        if wait > 0:
+            time.sleep(wait)
+
+RATE_LIMITER = RateLimiter(CONFIG['requests_per_minute'])
+
 def truthy(val) -> bool:
     return str(val).lower() in TRUTHY
 
-def get_url(entity, id, secondary_id=None, start_date=None):
-    if not isinstance(id, int):
-        id = id.replace("/", "%2F")
-
-    if secondary_id and not isinstance(secondary_id, int):
-        secondary_id = secondary_id.replace("/", "%2F")
+def get_schema(entity):
+    """
+    Return this thread's copy of the schema of entity.
+    singer's Transformer reorders the types of a schema in place while
+    transforming a record, so concurrently synced streams, and streams that
+    share a schema file, must not share one
+    """
+    schemas = getattr(THREAD_SCHEMAS, 'schemas', None)
+    if schemas is None:
+        schemas = THREAD_SCHEMAS.schemas = {}
+    if entity not in schemas:
+        schemas[entity] = copy.deepcopy(RESOURCES[entity]['schema'])
+    return schemas[entity]
+
+def is_new_user(user_id) -> bool:
+    with EMITTED_USERS_LOCK:
+        if user_id in EMITTED_USERS:
+            return False
+        EMITTED_USERS.add(user_id)
+        return True
+
+def write_message(message):
+    # orjson serializes straight from C, which is considerably faster than
+    #  the simplejson encoder singer uses for every emitted message
+    # A single write per message keeps lines whole when streams are synced
+    #  from several threads
+    STDOUT.write(orjson.dumps(message.asdict(), option=orjson.OPT_APPEND_NEWLINE))
+
+    # Records are only flushed in batches, but a STATE message is always
+    #  flushed right away so targets can checkpoint on it
+    if isinstance(message, singer.messages.StateMessage):
+        STDOUT.flush()
+
+def quote_id(id):
+    # Project and group paths are sent URL-encoded in place of their id.
+    #  Paths that are already encoded in the config (e.g. "group%2Fproject")
+    #  are kept as they are
+    if not id or isinstance(id, int):
+        return id
+    return quote(id, safe='%')
+
+def quote_start_date(start_date):
+    # start_date may carry a "+" offset, which GitLab would read as a space
+    #  if it reached the query string unencoded
+    if not start_date:
+        return start_date
+    return quote(start_date, safe=':')
 
+def get_url(entity, id, secondary_id=None, start_date=None):
     return CONFIG['api_url'] + RESOURCES[entity]['url'].format(
-            id=id,
-            secondary_id=secondary_id,
-            start_date=start_date
+            id=quote_id(id),
+            secondary_id=quote_id(secondary_id),
+            start_date=quote_start_date(start_date)
         )
 
 
+def get_rate_limit_wait(resp):
+    # GitLab sends Retry-After on throttled responses, and the epoch at which
+    #  the current rate limit window resets in RateLimit-Reset
+    #  https://docs.gitlab.com/ee/user/admin_area/settings/user_and_ip_rate_limits.html#response-headers
+    retry_after = resp.headers.get('Retry-After', '')
+    if retry_after.isdigit():
+        return max(int(retry_after), 1)
+
+    reset = resp.headers.get('RateLimit-Reset', '')
+    if reset.isdigit():
+        return max(int(reset) - time.time(), 1)
+
+    return 60
+
+
 def get_start(entity):
     if entity not in STATE or parse_datetime(STATE[entity]) < parse_datetime(CONFIG['start_date']):
         STATE[entity] = CONFIG['start_date']
     return STATE[entity]
 
+def get_bookmarks(state_key):
+    """
+    Return the bookmarks of an incremental stream, starting from its
+    bookmark in STATE. GitLab does not return rows in replication key order
+    (most recently updated first), so a stream advances these bookmarks while
+    writing its rows and only commits them to STATE once every row has been
+    written: resuming from a partially advanced bookmark would skip rows
+    """
+    return {state_key: get_start(state_key)}
+
+def commit_bookmarks(bookmarks):
+    STATE.update(bookmarks)
+    singer.write_state(STATE)
+
 
 @backoff.on_exception(backoff.expo,
                       (requests.exceptions.RequestException),
@@ -257,17 +447,38 @@ def get_start(entity):
 def request(url, params=None):
     params = params or {}
 
-    headers = { "Private-Token": CONFIG['private_token'] }
-    if 'user_agent' in CONFIG:
-        headers['User-Agent'] = CONFIG['user_agent']
+    retries = 0
+    while True:
+        RATE_LIMITER.acquire()
+        resp = SESSION.request('GET', url, params=params, timeout=REQUEST_TIMEOUT)
+        LOGGER.info("GET {}".format(url))
 
-    resp = SESSION.request('GET', url, params=params, headers=headers)
-    LOGGER.info("GET {}".format(url))
+        if resp.status_code != 429:
+            PAGE_CONCURRENCY.increase()
+            break
+
+        PAGE_CONCURRENCY.decrease()
+        if retries >= RATE_LIMIT_MAX_RETRIES:
+            break
+
+        # Wait for the rate limit window to reset instead of failing the sync,
+        #  holding back the requests of every other thread in the meantime
+        wait = get_rate_limit_wait(resp)
+        LOGGER.warning("Rate limited by the GitLab API, retrying GET {} in {:.0f}s".format(url, wait))
+        RATE_LIMITER.pause(wait)
+        retries += 1
 
     if resp.status_code in [401, 403, 404]:
         LOGGER.info("Skipping request to {}".format(url))
         LOGGER.info("Reason: {} - {}".format(resp.status_code, resp.content))
         raise ResourceInaccessible
+    elif resp.status_code >= 500:
+        # Raise the HTTPError so that backoff retries server errors
+        #  before giving up on the sync
+        LOGGER.warning(
+            "Error making request to GitLab API: GET {} [{} - {}]".format(
+                url, resp.status_code, resp.content))
+        resp.raise_for_status()
     elif resp.status_code >= 400:
         LOGGER.critical(
             "Error making request to GitLab API: GET {} [{} - {}]".format(
@@ -276,108 +487,199 @@ def request(url, params=None):
 
     return resp
 
-def gen_request(url):
+def gen_page_rows(resp):
+    # orjson decodes the raw body in C, skipping the text decoding of resp.json()
+    resp_json = orjson.loads(resp.content)
+    # handle endpoints that return a single JSON object
+    if isinstance(resp_json, dict):
+        yield resp_json
+    # handle endpoints that return an array of JSON objects
+    else:
+        yield from resp_json
+
+def get_total_pages(resp):
+    total_pages = resp.headers.get('X-Total-Pages')
+    if total_pages:
+        return int(total_pages)
+
+    # Fall back to the page number of the rel="last" pagination link
+    last_link = resp.links.get('last')
+    if last_link:
+        last_page = parse_qs(urlparse(last_link['url']).query).get('page')
+        if last_page:
+            return int(last_page[0])
+
+    return 0
+
+def gen_concurrent_pages(url, params, pages):
+    """
+    Fetch the given pages with up to PAGE_CONCURRENCY requests in flight,
+    yielding the rows of each page in page order
+    """
+    pending = collections.deque()
+
+    with ThreadPoolExecutor(max_workers=CONFIG['page_concurrency']) as executor:
+        for page in pages:
+            pending.append(executor.submit(request, url, dict(params, page=page)))
+            while len(pending) >= PAGE_CONCURRENCY.limit:
+                yield from gen_page_rows(pending.popleft().result())
+
+        while pending:
+            yield from gen_page_rows(pending.popleft().result())
+
+def gen_following_pages(resp, get_next):
+    """
+    Yield the rows of resp and of every page following it, where
+    get_next(resp) returns the (url, params) of the page after resp or None.
+    With a `page_concurrency` above 1, each next page is requested in the
+    background while the rows of the current one are consumed
+    """
+    if CONFIG['page_concurrency'] <= 1:
+        while resp is not None:
+            next_request = get_next(resp)
+            yield from gen_page_rows(resp)
+            resp = request(*next_request) if next_request else None
+        return
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        while resp is not None:
+            next_request = get_next(resp)
+            future = executor.submit(request, *next_request) if next_request else None
+            yield from gen_page_rows(resp)
+            resp = future.result() if future else None
+
+def get_next_link(resp):
+    # Keyset paginated responses carry the cursor of the next page in the
+    #  query string of their rel="next" link
+    next_link = resp.links.get('next')
+    return (next_link['url'], None) if next_link else None
+
+def gen_request(url, keyset_pagination=False):
     if 'labels' in url:
         # The labels API is timing out for large per_page values
         #  https://gitlab.com/gitlab-org/gitlab-ce/issues/63103
-        # Keeping it at 20 until the bug is fixed
-        per_page = 20
+        # Keeping it at 20 by default, instances without the bug can raise it
+        per_page = CONFIG['labels_per_page']
     else:
         per_page = PER_PAGE_MAX
 
-    params = {
-        'page': 1,
-        'per_page': per_page
-    }
+    try:
+        # Keyset pagination seeks straight to the next page on GitLab's side,
+        #  instead of paying for an ever growing offset on large resources
+        #  https://docs.gitlab.com/ee/api/#keyset-based-pagination
+        if keyset_pagination:
+            resp = request(url, {
+                'pagination': 'keyset',
+                'per_page': per_page,
+                'order_by': 'id',
+                'sort': 'asc',
+            })
+            yield from gen_following_pages(resp, get_next_link)
+            return
 
-    # X-Total-Pages header is not always available since GitLab 11.8
-    #  https://docs.gitlab.com/ee/api/#other-pagination-headers
-    # X-Next-Page to check if there is another page available and iterate
-    next_page = 1
+        params = {
+            'page': 1,
+            'per_page': per_page
+        }
 
-    try:
-        while next_page:
-            params['page'] = int(next_page)
-            resp = request(url, params)
-            resp_json = resp.json()
-            # handle endpoints that return a single JSON object
-            if isinstance(resp_json, dict):
-                yield resp_json
-            # handle endpoints that return an array of JSON objects
-            else:
-                for row in resp_json:
-                    yield row
-            next_page = resp.headers.get('X-Next-Page', None)
-    except ResourceInaccessible as exc:
+        resp = request(url, params)
+
+        # When the total number of pages is known, the remaining pages are
+        #  fetched concurrently instead of one round trip at a time
+        total_pages = get_total_pages(resp)
+        if total_pages > 1 and CONFIG['page_concurrency'] > 1:
+            yield from gen_page_rows(resp)
+            yield from gen_concurrent_pages(url, params, range(2, total_pages + 1))
+            return
+
+        # Neither X-Total-Pages nor the rel="last" link is always available
+        #  since GitLab 11.8
+        #  https://docs.gitlab.com/ee/api/#other-pagination-headers
+        # X-Next-Page to check if there is another page available and iterate
+        def get_next_page(page_resp):
+            next_page = page_resp.headers.get('X-Next-Page', None)
+            return (url, dict(params, page=int(next_page))) if next_page else None
+
+        yield from gen_following_pages(resp, get_next_page)
+    except ResourceInaccessible:
         # Don't halt execution if a Resource is Inaccessible
         # Just skip it and continue with the rest of the extraction
-        return []
+        return
 
 def format_timestamp(data, typ, schema):
     result = data
     if data and typ == 'string' and schema.get('format') == 'date-time':
-        rfc3339_ts = rfc3339_to_timestamp(data)
-        utc_dt = datetime.datetime.utcfromtimestamp(rfc3339_ts).replace(tzinfo=pytz.UTC)
-        result = utils.strftime(utc_dt)
+        match = UTC_DATETIME_REGEX.match(data)
+        if match:
+            # Already in UTC, only the fraction needs padding to microseconds
+            seconds, fraction = match.groups()
+            result = '{}.{:0<6}Z'.format(seconds, fraction or '')
+        else:
+            utc_dt = parse_datetime(data).astimezone(datetime.timezone.utc)
+            result = utils.strftime(utc_dt)
 
     return result
 
 def flatten_id(item, target):
-    if target in item and item[target] is not None:
-        item[target + '_id'] = item.pop(target, {}).pop('id', None)
-    else:
+    value = item.get(target)
+    if value is None:
         item[target + '_id'] = None
+    else:
+        del item[target]
+        item[target + '_id'] = value.get('id')
 
 def sync_branches(project):
     entity = "branches"
-    stream = CATALOG.get_stream(entity)
-    if stream is None or not stream.is_selected():
+    mdata = SELECTED_STREAMS.get(entity)
+    if mdata is None:
         return
-    mdata = metadata.to_map(stream.metadata)
 
     url = get_url(entity="branches", id=project['id'])
     with Transformer(pre_hook=format_timestamp) as transformer:
+        time_extracted = utils.now()
         for row in gen_request(url):
             row['project_id'] = project['id']
             flatten_id(row, "commit")
-            transformed_row = transformer.transform(row, RESOURCES["branches"]["schema"], mdata)
-            singer.write_record("branches", transformed_row, time_extracted=utils.now())
+            transformed_row = transformer.transform(row, get_schema("branches"), mdata)
+            singer.write_record("branches", transformed_row, time_extracted=time_extracted)
 
 def sync_commits(project):
     entity = "commits"
-    stream = CATALOG.get_stream(entity)
-    if stream is None or not stream.is_selected():
+    mdata = SELECTED_STREAMS.get(entity)
+    if mdata is None:
         return
-    mdata = metadata.to_map(stream.metadata)
 
     # Keep a state for the commits fetched per project
     state_key = "project_{}_commits".format(project["id"])
-    start_date=get_start(state_key)
+    bookmarks = get_bookmarks(state_key)
+    start_date = bookmarks[state_key]
 
     url = get_url(entity=entity, id=project['id'], start_date=start_date)
     with Transformer(pre_hook=format_timestamp) as transformer:
+        time_extracted = utils.now()
         for row in gen_request(url):
             row['project_id'] = project["id"]
-            transformed_row = transformer.transform(row, RESOURCES[entity]["schema"], mdata)
+            transformed_row = transformer.transform(row, get_schema(entity), mdata)
 
-            singer.write_record(entity, transformed_row, time_extracted=utils.now())
-            utils.update_state(STATE, state_key, row['created_at'])
+            singer.write_record(entity, transformed_row, time_extracted=time_extracted)
+            utils.update_state(bookmarks, state_key, row['created_at'])
 
-    singer.write_state(STATE)
+    commit_bookmarks(bookmarks)
 
 def sync_issues(project):
     entity = "issues"
-    stream = CATALOG.get_stream(entity)
-    if stream is None or not stream.is_selected():
+    mdata = SELECTED_STREAMS.get(entity)
+    if mdata is None:
         return
-    mdata = metadata.to_map(stream.metadata)
 
     # Keep a state for the issues fetched per project
     state_key = "project_{}_issues".format(project["id"])
-    start_date=get_start(state_key)
+    bookmarks = get_bookmarks(state_key)
+    start_date = bookmarks[state_key]
 
     url = get_url(entity=entity, id=project['id'], start_date=start_date)
     with Transformer(pre_hook=format_timestamp) as transformer:
+        time_extracted = utils.now()
         for row in gen_request(url):
             flatten_id(row, "author")
             flatten_id(row, "assignee")
@@ -386,44 +688,36 @@ def sync_issues(project):
             flatten_id(row, "milestone")
 
             # Get the assignee ids
-            assignee_ids = []
-            for assignee in row.get("assignees"):
-                assignee_ids.append(assignee["id"])
-            row["assignees"] = assignee_ids
+            row["assignees"] = [assignee["id"] for assignee in row.get("assignees") or ()]
 
             # Get the time_stats
-            time_stats = row.get("time_stats")
-            if time_stats:
-                row["time_estimate"] = time_stats.get("time_estimate")
-                row["total_time_spent"] = time_stats.get("total_time_spent")
-                row["human_time_estimate"] = time_stats.get("human_time_estimate")
-                row["human_total_time_spent"] = time_stats.get("human_total_time_spent")
-            else:
-                row["time_estimate"] = None
-                row["total_time_spent"] = None
-                row["human_time_estimate"] = None
-                row["human_total_time_spent"] = None
-
-            transformed_row = transformer.transform(row, RESOURCES[entity]["schema"], mdata)
-
-            singer.write_record(entity, transformed_row, time_extracted=utils.now())
-            utils.update_state(STATE, state_key, row['updated_at'])
+            time_stats = row.get("time_stats") or {}
+            row["time_estimate"] = time_stats.get("time_estimate")
+            row["total_time_spent"] = time_stats.get("total_time_spent")
+            row["human_time_estimate"] = time_stats.get("human_time_estimate")
+            row["human_total_time_spent"] = time_stats.get("human_total_time_spent")
 
-    singer.write_state(STATE)
+            transformed_row = transformer.transform(row, get_schema(entity), mdata)
+
+            singer.write_record(entity, transformed_row, time_extracted=time_extracted)
+            utils.update_state(bookmarks, state_key, row['updated_at'])
+
+    commit_bookmarks(bookmarks)
 
 def sync_merge_requests(project):
     entity = "merge_requests"
-    stream = CATALOG.get_stream(entity)
-    if stream is None or not stream.is_selected():
+    mdata = SELECTED_STREAMS.get(entity)
+    if mdata is None:
         return
-    mdata = metadata.to_map(stream.metadata)
 
     # Keep a state for the merge requests fetched per project
     state_key = "project_{}_merge_requests".format(project["id"])
-    start_date=get_start(state_key)
+    bookmarks = get_bookmarks(state_key)
+    start_date = bookmarks[state_key]
 
     url = get_url(entity=entity, id=project['id'], start_date=start_date)
     with Transformer(pre_hook=format_timestamp) as transformer:
+        time_extracted = utils.now()
         for row in gen_request(url):
             flatten_id(row, "author")
             flatten_id(row, "assignee")
@@ -432,234 +726,219 @@ def sync_merge_requests(project):
             flatten_id(row, "closed_by")
 
             # Get the assignee ids
-            assignee_ids = []
-            for assignee in row.get("assignees"):
-                assignee_ids.append(assignee["id"])
-            row["assignees"] = assignee_ids
+            row["assignees"] = [assignee["id"] for assignee in row.get("assignees") or ()]
 
             # Get the reviewer ids
-            reviewer_ids = []
-            for reviewer in row.get("reviewers"):
-                reviewer_ids.append(reviewer["id"])
-            row["reviewers"] = reviewer_ids
+            row["reviewers"] = [reviewer["id"] for reviewer in row.get("reviewers") or ()]
 
             # Get the time_stats
-            time_stats = row.get("time_stats")
-            if time_stats:
-                row["time_estimate"] = time_stats.get("time_estimate")
-                row["total_time_spent"] = time_stats.get("total_time_spent")
-                row["human_time_estimate"] = time_stats.get("human_time_estimate")
-                row["human_total_time_spent"] = time_stats.get("human_total_time_spent")
-            else:
-                row["time_estimate"] = None
-                row["total_time_spent"] = None
-                row["human_time_estimate"] = None
-                row["human_total_time_spent"] = None
-
-            transformed_row = transformer.transform(row, RESOURCES[entity]["schema"], mdata)
+            time_stats = row.get("time_stats") or {}
+            row["time_estimate"] = time_stats.get("time_estimate")
+            row["total_time_spent"] = time_stats.get("total_time_spent")
+            row["human_time_estimate"] = time_stats.get("human_time_estimate")
+            row["human_total_time_spent"] = time_stats.get("human_total_time_spent")
+
+            transformed_row = transformer.transform(row, get_schema(entity), mdata)
 
             # Write the MR record
-            singer.write_record(entity, transformed_row, time_extracted=utils.now())
-            utils.update_state(STATE, state_key, row['updated_at'])
+            singer.write_record(entity, transformed_row, time_extracted=time_extracted)
+            utils.update_state(bookmarks, state_key, row['updated_at'])
 
             # And then sync all the commits for this MR
             # (if it has changed, new commits may be there to fetch)
-            sync_merge_request_commits(project, transformed_row)
+            sync_merge_request_commits(project, transformed_row, transformer)
 
-    singer.write_state(STATE)
+    commit_bookmarks(bookmarks)
 
-def sync_merge_request_commits(project, merge_request):
+def sync_merge_request_commits(project, merge_request, transformer):
     entity = "merge_request_commits"
-    stream = CATALOG.get_stream(entity)
-    if stream is None or not stream.is_selected():
+    mdata = SELECTED_STREAMS.get(entity)
+    if mdata is None:
         return
-    mdata = metadata.to_map(stream.metadata)
 
     url = get_url(entity="merge_request_commits", id=project['id'], secondary_id=merge_request['iid'])
 
-    with Transformer(pre_hook=format_timestamp) as transformer:
-        for row in gen_request(url):
-            row['project_id'] = project['id']
-            row['merge_request_iid'] = merge_request['iid']
-            row['commit_id'] = row['id']
-            row['commit_short_id'] = row['short_id']
-            transformed_row = transformer.transform(row, RESOURCES["merge_request_commits"]["schema"], mdata)
+    time_extracted = utils.now()
+    for row in gen_request(url):
+        row['project_id'] = project['id']
+        row['merge_request_iid'] = merge_request['iid']
+        row['commit_id'] = row['id']
+        row['commit_short_id'] = row['short_id']
+        transformed_row = transformer.transform(row, get_schema("merge_request_commits"), mdata)
 
-            singer.write_record("merge_request_commits", transformed_row, time_extracted=utils.now())
+        singer.write_record("merge_request_commits", transformed_row, time_extracted=time_extracted)
 
 def sync_releases(project):
     entity = "releases"
-    stream = CATALOG.get_stream(entity)
-    if stream is None or not stream.is_selected():
+    mdata = SELECTED_STREAMS.get(entity)
+    if mdata is None:
         return
-    mdata = metadata.to_map(stream.metadata)
 
     url = get_url(entity="releases", id=project['id'])
     with Transformer(pre_hook=format_timestamp) as transformer:
+        time_extracted = utils.now()
         for row in gen_request(url):
             flatten_id(row, "author")
             flatten_id(row, "commit")
             row['project_id'] = project["id"]
-            transformed_row = transformer.transform(row, RESOURCES["releases"]["schema"], mdata)
+            transformed_row = transformer.transform(row, get_schema("releases"), mdata)
 
-            singer.write_record("releases", transformed_row, time_extracted=utils.now())
+            singer.write_record("releases", transformed_row, time_extracted=time_extracted)
 
 
 def sync_tags(project):
     entity = "tags"
-    stream = CATALOG.get_stream(entity)
-    if stream is None or not stream.is_selected():
+    mdata = SELECTED_STREAMS.get(entity)
+    if mdata is None:
         return
-    mdata = metadata.to_map(stream.metadata)
 
     url = get_url(entity="tags", id=project['id'])
     with Transformer(pre_hook=format_timestamp) as transformer:
+        time_extracted = utils.now()
         for row in gen_request(url):
             flatten_id(row, "commit")
             row['project_id'] = project["id"]
-            transformed_row = transformer.transform(row, RESOURCES["tags"]["schema"], mdata)
+            transformed_row = transformer.transform(row, get_schema("tags"), mdata)
 
-            singer.write_record("tags", transformed_row, time_extracted=utils.now())
+            singer.write_record("tags", transformed_row, time_extracted=time_extracted)
 
 
 def sync_milestones(entity, element="project"):
     stream_name = "{}_milestones".format(element)
-    stream = CATALOG.get_stream(stream_name)
-    if stream is None or not stream.is_selected():
+    mdata = SELECTED_STREAMS.get(stream_name)
+    if mdata is None:
         return
-    mdata = metadata.to_map(stream.metadata)
 
     url = get_url(entity=element + "_milestones", id=entity['id'])
 
     with Transformer(pre_hook=format_timestamp) as transformer:
+        time_extracted = utils.now()
         for row in gen_request(url):
-            transformed_row = transformer.transform(row, RESOURCES[element + "_milestones"]["schema"], mdata)
+            transformed_row = transformer.transform(row, get_schema(element + "_milestones"), mdata)
 
-            singer.write_record(element + "_milestones", transformed_row, time_extracted=utils.now())
+            singer.write_record(element + "_milestones", transformed_row, time_extracted=time_extracted)
 
 def sync_users(project):
     entity = "users"
-    stream = CATALOG.get_stream(entity)
-    if stream is None or not stream.is_selected():
+    mdata = SELECTED_STREAMS.get(entity)
+    if mdata is None:
         return
-    mdata = metadata.to_map(stream.metadata)
 
     url = get_url(entity="users", id=project['id'])
-    project["users"] = []
     with Transformer(pre_hook=format_timestamp) as transformer:
+        time_extracted = utils.now()
         for row in gen_request(url):
-            transformed_row = transformer.transform(row, RESOURCES["users"]["schema"], mdata)
-            project["users"].append(row["id"])
-            singer.write_record("users", transformed_row, time_extracted=utils.now())
+            if not is_new_user(row['id']):
+                continue
+            transformed_row = transformer.transform(row, get_schema("users"), mdata)
+            singer.write_record("users", transformed_row, time_extracted=time_extracted)
 
 def sync_site_users():
     entity = "site_users"
-    stream = CATALOG.get_stream(entity)
-    if stream is None or not stream.is_selected():
+    mdata = SELECTED_STREAMS.get(entity)
+    if mdata is None:
         return
-    mdata = metadata.to_map(stream.metadata)
 
     url = get_url(entity="site_users", id="all")
     with Transformer(pre_hook=format_timestamp) as transformer:
-        for row in gen_request(url):
-            transformed_row = transformer.transform(row, RESOURCES["users"]["schema"], mdata)
-            singer.write_record("site_users", transformed_row, time_extracted=utils.now())
+        time_extracted = utils.now()
+        for row in gen_request(url, RESOURCES["site_users"]["keyset_pagination"]):
+            transformed_row = transformer.transform(row, get_schema("users"), mdata)
+            singer.write_record("site_users", transformed_row, time_extracted=time_extracted)
 
 
 def sync_members(entity, element="project"):
     stream_name = "{}_members".format(element)
-    member_stream = CATALOG.get_stream(stream_name)
-    if member_stream is None or not member_stream.is_selected():
+    member_mdata = SELECTED_STREAMS.get(stream_name)
+    if member_mdata is None:
         return
-    user_stream = CATALOG.get_stream('users')
-    member_mdata = metadata.to_map(member_stream.metadata)
-    user_mdata = metadata.to_map(user_stream.metadata)
+    user_mdata = SELECTED_STREAMS.get('users')
 
     url = get_url(entity=stream_name, id=entity['id'])
 
     with Transformer(pre_hook=format_timestamp) as transformer:
+        time_extracted = utils.now()
         for row in gen_request(url):
             # First, write a record for the user
-            if user_stream.is_selected():
-                user_row = transformer.transform(row, RESOURCES["users"]["schema"], user_mdata)
-                singer.write_record("users", user_row, time_extracted=utils.now())
+            if user_mdata is not None and is_new_user(row['id']):
+                user_row = transformer.transform(row, get_schema("users"), user_mdata)
+                singer.write_record("users", user_row, time_extracted=time_extracted)
 
             # And then a record for the member
             row[element + '_id'] = entity['id']
             row['user_id'] = row['id']
-            member_row = transformer.transform(row, RESOURCES[element + "_members"]["schema"], member_mdata)
-            singer.write_record(element + "_members", member_row, time_extracted=utils.now())
+            member_row = transformer.transform(row, get_schema(element + "_members"), member_mdata)
+            singer.write_record(element + "_members", member_row, time_extracted=time_extracted)
 
 
 def sync_labels(entity, element="project"):
     stream_name = "{}_labels".format(element)
-    stream = CATALOG.get_stream(stream_name)
-    if stream is None or not stream.is_selected():
+    mdata = SELECTED_STREAMS.get(stream_name)
+    if mdata is None:
         return
-    mdata = metadata.to_map(stream.metadata)
 
     url = get_url(entity=element + "_labels", id=entity['id'])
 
     with Transformer(pre_hook=format_timestamp) as transformer:
+        time_extracted = utils.now()
         for row in gen_request(url):
             row[element + '_id'] = entity['id']
-            transformed_row = transformer.transform(row, RESOURCES[element + "_labels"]["schema"], mdata)
-            singer.write_record(element + "_labels", transformed_row, time_extracted=utils.now())
+            transformed_row = transformer.transform(row, get_schema(element + "_labels"), mdata)
+            singer.write_record(element + "_labels", transformed_row, time_extracted=time_extracted)
 
-def sync_epic_issues(group, epic):
+def sync_epic_issues(group, epic, transformer):
     entity = "epic_issues"
-    stream = CATALOG.get_stream(entity)
-    if stream is None or not stream.is_selected():
+    mdata = SELECTED_STREAMS.get(entity)
+    if mdata is None:
         return
-    mdata = metadata.to_map(stream.metadata)
 
     url = get_url(entity="epic_issues", id=group['id'], secondary_id=epic['iid'])
 
-    with Transformer(pre_hook=format_timestamp) as transformer:
-        for row in gen_request(url):
-            row['group_id'] = group['id']
-            row['epic_iid'] = epic['iid']
-            row['issue_id'] = row['id']
-            row['issue_iid'] = row['iid']
-            transformed_row = transformer.transform(row, RESOURCES["epic_issues"]["schema"], mdata)
+    time_extracted = utils.now()
+    for row in gen_request(url):
+        row['group_id'] = group['id']
+        row['epic_iid'] = epic['iid']
+        row['issue_id'] = row['id']
+        row['issue_iid'] = row['iid']
+        transformed_row = transformer.transform(row, get_schema("epic_issues"), mdata)
 
-            singer.write_record("epic_issues", transformed_row, time_extracted=utils.now())
+        singer.write_record("epic_issues", transformed_row, time_extracted=time_extracted)
 
 def sync_epics(group):
     entity = "epics"
-    stream = CATALOG.get_stream(entity)
-    if stream is None or not stream.is_selected():
+    mdata = SELECTED_STREAMS.get(entity)
+    if mdata is None:
         return
-    mdata = metadata.to_map(stream.metadata)
 
     # Keep a state for the epics fetched per group
     state_key = "group_{}_epics".format(group['id'])
-    start_date=get_start(state_key)
+    bookmarks = get_bookmarks(state_key)
+    start_date = bookmarks[state_key]
 
     url = get_url(entity=entity, id=group['id'], start_date=start_date)
     with Transformer(pre_hook=format_timestamp) as transformer:
+        time_extracted = utils.now()
         for row in gen_request(url):
             flatten_id(row, "author")
-            transformed_row = transformer.transform(row, RESOURCES[entity]["schema"], mdata)
+            transformed_row = transformer.transform(row, get_schema(entity), mdata)
 
             # Write the Epic record
-            singer.write_record(entity, transformed_row, time_extracted=utils.now())
-            utils.update_state(STATE, state_key, row['updated_at'])
+            singer.write_record(entity, transformed_row, time_extracted=time_extracted)
+            utils.update_state(bookmarks, state_key, row['updated_at'])
 
             # And then sync all the issues for that Epic
             # (if it has changed, new issues may be there to fetch)
-            sync_epic_issues(group, transformed_row)
+            sync_epic_issues(group, transformed_row, transformer)
 
-    singer.write_state(STATE)
+    commit_bookmarks(bookmarks)
 
 def sync_group(gid, pids):
-    stream = CATALOG.get_stream("groups")
-    mdata = metadata.to_map(stream.metadata)
+    mdata = SELECTED_STREAMS.get("groups")
     url = get_url(entity="groups", id=gid)
 
     try:
-        data = request(url).json()
-    except ResourceInaccessible as exc:
+        data = orjson.loads(request(url).content)
+    except ResourceInaccessible:
         # Don't halt execution if a Group is Inaccessible
         # Just skip it and continue with the rest of the extraction
         return
@@ -669,14 +948,13 @@ def sync_group(gid, pids):
     if not pids:
         #  Get all the projects of the group if none are provided
         group_projects_url = get_url(entity="group_projects", id=gid)
-        for project in gen_request(group_projects_url):
-            if project["id"]:
-                sync_project(project["id"])
+        sync_projects((project["id"], project.get("last_activity_at"))
+                      for project in gen_request(group_projects_url) if project["id"])
     else:
         # Sync only specific projects of the group, if explicit projects are provided
-        for pid in pids:
-            if pid.startswith(data['full_path'] + '/') or pid in [str(p['id']) for p in data['projects']]:
-                sync_project(pid)
+        group_pids = [str(p['id']) for p in data['projects']]
+        sync_projects((pid, None) for pid in pids
+                      if pid.startswith(data['full_path'] + '/') or pid in group_pids)
 
     sync_milestones(data, "group")
 
@@ -689,124 +967,156 @@ def sync_group(gid, pids):
     if CONFIG['ultimate_license']:
         sync_epics(data)
 
-    if not stream.is_selected():
+    if mdata is None:
         return
 
     with Transformer(pre_hook=format_timestamp) as transformer:
-        group = transformer.transform(data, RESOURCES["groups"]["schema"], mdata)
+        group = transformer.transform(data, get_schema("groups"), mdata)
         singer.write_record("groups", group, time_extracted=time_extracted)
 
 def sync_pipelines(project):
     entity = "pipelines"
-    stream = CATALOG.get_stream(entity)
-    if stream is None or not stream.is_selected():
+    mdata = SELECTED_STREAMS.get(entity)
+    if mdata is None:
         return
 
-    mdata = metadata.to_map(stream.metadata)
     # Keep a state for the pipelines fetched per project
     state_key = "project_{}_pipelines".format(project['id'])
-    start_date=get_start(state_key)
+    bookmarks = get_bookmarks(state_key)
+    start_date = bookmarks[state_key]
 
     url = get_url(entity=entity, id=project['id'], start_date=start_date)
 
+    # Child streams are synced per pipeline, so check once whether they are selected
+    sync_extended = "pipelines_extended" in SELECTED_STREAMS
+    sync_pipeline_jobs = "jobs" in SELECTED_STREAMS
+
     with Transformer(pre_hook=format_timestamp) as transformer:
+        time_extracted = utils.now()
         for row in gen_request(url):
 
-            transformed_row = transformer.transform(row, RESOURCES[entity]["schema"], mdata)
+            transformed_row = transformer.transform(row, get_schema(entity), mdata)
 
             # Write the Pipeline record
-            singer.write_record(entity, transformed_row, time_extracted=utils.now())
-            utils.update_state(STATE, state_key, row['updated_at'])
+            singer.write_record(entity, transformed_row, time_extracted=time_extracted)
+            utils.update_state(bookmarks, state_key, row['updated_at'])
 
             # Sync additional details of a pipeline using get-a-single-pipeline endpoint
             # https://docs.gitlab.com/ee/api/pipelines.html#get-a-single-pipeline
-            sync_pipelines_extended(project, transformed_row)
+            if sync_extended:
+                sync_pipelines_extended(project, transformed_row, transformer)
 
             # Sync all jobs attached to the pipeline.
             # Although jobs cannot be queried by updated_at, if a job changes
             # it's pipeline's updated_at is changed.
-            sync_jobs(project, transformed_row)
+            if sync_pipeline_jobs:
+                sync_jobs(project, transformed_row, transformer)
 
-    singer.write_state(STATE)
+    commit_bookmarks(bookmarks)
 
-def sync_pipelines_extended(project, pipeline):
+def sync_pipelines_extended(project, pipeline, transformer):
     entity = "pipelines_extended"
-    stream = CATALOG.get_stream(entity)
-    if not stream.is_selected():
+    mdata = SELECTED_STREAMS.get(entity)
+    if mdata is None:
         return
 
-    mdata = metadata.to_map(stream.metadata)
     url = get_url(entity=entity, id=project['id'], secondary_id=pipeline['id'])
 
-    with Transformer(pre_hook=format_timestamp) as transformer:
-        for row in gen_request(url):
-            row['project_id'] = project['id']
-            transformed_row = transformer.transform(row, RESOURCES[entity]["schema"], mdata)
+    time_extracted = utils.now()
+    for row in gen_request(url):
+        row['project_id'] = project['id']
+        transformed_row = transformer.transform(row, get_schema(entity), mdata)
 
-            singer.write_record(entity, transformed_row, time_extracted=utils.now())
+        singer.write_record(entity, transformed_row, time_extracted=time_extracted)
 
 def sync_vulnerabilities(project):
     entity = "vulnerabilities"
-    stream = CATALOG.get_stream(entity)
-    if stream is None or not stream.is_selected():
+    mdata = SELECTED_STREAMS.get(entity)
+    if mdata is None:
         return
-    mdata = metadata.to_map(stream.metadata)
 
     url = get_url(entity="vulnerabilities", id=project['id'])
-    project["vulnerabilities"] = []
     with Transformer(pre_hook=format_timestamp) as transformer:
+        time_extracted = utils.now()
         for row in gen_request(url):
-            transformed_row = transformer.transform(row, RESOURCES["vulnerabilities"]["schema"], mdata)
-            project["vulnerabilities"].append(row["id"])
-            singer.write_record("vulnerabilities", transformed_row, time_extracted=utils.now())
+            transformed_row = transformer.transform(row, get_schema("vulnerabilities"), mdata)
+            singer.write_record("vulnerabilities", transformed_row, time_extracted=time_extracted)
 
-def sync_jobs(project, pipeline):
+def sync_jobs(project, pipeline, transformer):
     entity = "jobs"
-    stream = CATALOG.get_stream(entity)
-    if stream is None or not stream.is_selected():
+    mdata = SELECTED_STREAMS.get(entity)
+    if mdata is None:
         return
-    mdata = metadata.to_map(stream.metadata)
 
     url = get_url(entity=entity, id=project['id'], secondary_id=pipeline['id'])
-    with Transformer(pre_hook=format_timestamp) as transformer:
-        for row in gen_request(url):
-            row['project_id'] = project['id']
-            flatten_id(row, 'user')
-            flatten_id(row, 'commit')
-            flatten_id(row, 'pipeline')
-            flatten_id(row, 'runner')
+    time_extracted = utils.now()
+    for row in gen_request(url):
+        row['project_id'] = project['id']
+        flatten_id(row, 'user')
+        flatten_id(row, 'commit')
+        flatten_id(row, 'pipeline')
+        flatten_id(row, 'runner')
 
-            transformed_row = transformer.transform(row, RESOURCES[entity]['schema'], mdata)
-            singer.write_record(entity, transformed_row, time_extracted=utils.now())
+        transformed_row = transformer.transform(row, get_schema(entity), mdata)
+        singer.write_record(entity, transformed_row, time_extracted=time_extracted)
 
 def sync_variables(entity, element="project"):
     stream_name = "{}_variables".format(element)
-    stream = CATALOG.get_stream(stream_name)
-    if stream is None or not stream.is_selected():
+    mdata = SELECTED_STREAMS.get(stream_name)
+    if mdata is None:
         return
-    mdata = metadata.to_map(stream.metadata)
 
     url = get_url(entity=element + "_variables", id=entity['id'])
 
     with Transformer(pre_hook=format_timestamp) as transformer:
+        time_extracted = utils.now()
         for row in gen_request(url):
             row[element + '_id'] = entity['id']
-            transformed_row = transformer.transform(row, RESOURCES[element + "_variables"]["schema"], mdata)
-            singer.write_record(element + "_variables", transformed_row, time_extracted=utils.now())
+            transformed_row = transformer.transform(row, get_schema(element + "_variables"), mdata)
+            singer.write_record(element + "_variables", transformed_row, time_extracted=time_extracted)
+
+def sync_concurrently(syncs, entity):
+    """
+    Run the sync functions of the streams that belong to entity, with up to
+    `stream_concurrency` of them running at the same time.
+    The syncs must not share mutable state: records are transformed against
+    this thread's copy of their schema (get_schema) and incremental bookmarks
+    stay local to their stream until it completes (see get_bookmarks)
+    """
+    with ThreadPoolExecutor(max_workers=CONFIG['stream_concurrency']) as executor:
+        futures = [executor.submit(sync, entity) for sync in syncs]
+        for future in futures:
+            future.result()
+
+def sync_projects(projects):
+    """
+    Sync projects, given as (pid, last_activity_at) pairs, with up to
+    `project_concurrency` of them running at the same time
+    """
+    with ThreadPoolExecutor(max_workers=CONFIG['project_concurrency']) as executor:
+        futures = [executor.submit(sync_project, pid, last_activity_at)
+                   for pid, last_activity_at in projects]
+        for future in futures:
+            future.result()
+
+def sync_project(pid, last_activity_at=None):
+    # Projects listed through their group already carry their last activity,
+    #  so the ones without any since the last sync are skipped before fetching
+    #  their details and statistics
+    if last_activity_at and last_activity_at < get_start("project_{}".format(pid)):
+        return
 
-def sync_project(pid):
     url = get_url(entity="projects", id=pid)
 
     try:
-        data = request(url).json()
-    except ResourceInaccessible as exc:
+        data = orjson.loads(request(url).content)
+    except ResourceInaccessible:
         # Don't halt execution if a Project is Inaccessible
         # Just skip it and continue with the rest of the extraction
         return
 
     time_extracted = utils.now()
-    stream = CATALOG.get_stream("projects")
-    mdata = metadata.to_map(stream.metadata)
+    mdata = SELECTED_STREAMS.get("projects")
 
     state_key = "project_{}".format(data["id"])
 
@@ -821,26 +1131,29 @@ def sync_project(pid):
 
     if data['last_activity_at'] >= get_start(state_key):
 
-        sync_members(data)
-        sync_users(data)
-        sync_issues(data)
-        sync_merge_requests(data)
-        sync_commits(data)
-        sync_branches(data)
-        sync_milestones(data)
-        sync_labels(data)
-        sync_releases(data)
-        sync_tags(data)
-        sync_pipelines(data)
-        sync_vulnerabilities(data)
-        sync_variables(data)
-
-        if not stream.is_selected():
+        # The streams of a project are independent of each other
+        sync_concurrently((
+            sync_members,
+            sync_users,
+            sync_issues,
+            sync_merge_requests,
+            sync_commits,
+            sync_branches,
+            sync_milestones,
+            sync_labels,
+            sync_releases,
+            sync_tags,
+            sync_pipelines,
+            sync_vulnerabilities,
+            sync_variables,
+        ), data)
+
+        if mdata is None:
             return
 
         with Transformer(pre_hook=format_timestamp) as transformer:
             flatten_id(data, "owner")
-            project = transformer.transform(data, RESOURCES["projects"]["schema"], mdata)
+            project = transformer.transform(data, get_schema("projects"), mdata)
             singer.write_record("projects", project, time_extracted=time_extracted)
 
         utils.update_state(STATE, state_key, last_activity_at)
@@ -848,7 +1161,6 @@ def sync_project(pid):
 
 def do_discover(select_all=False):
     streams = []
-    api_url_regex = re.compile(r'^gitlab.com')
 
     for resource, config in RESOURCES.items():
         mdata = metadata.get_standard_metadata(
@@ -861,7 +1173,7 @@ def do_discover(select_all=False):
         if (
             resource in ULTIMATE_RESOURCES and not CONFIG["ultimate_license"]
         ) or (
-            resource == "site_users" and api_url_regex.match(CONFIG['api_url']) is not None
+            resource == "site_users" and GITLAB_COM_REGEX.match(CONFIG['api_url']) is not None
         ) or (
             resource in STREAM_CONFIG_SWITCHES and not CONFIG["fetch_{}".format(resource)]
         ):
@@ -892,10 +1204,11 @@ def do_discover(select_all=False):
 def do_sync():
     LOGGER.info("Starting sync")
 
-    gids = list(filter(None, CONFIG['groups'].split(' ')))
-    pids = list(filter(None, CONFIG['projects'].split(' ')))
+    gids = CONFIG['groups'].split()
+    pids = CONFIG['projects'].split()
 
     for stream in CATALOG.get_selected_streams(STATE):
+        SELECTED_STREAMS[stream.tap_stream_id] = metadata.to_map(stream.metadata)
         singer.write_schema(stream.tap_stream_id, stream.schema.to_dict(), stream.key_properties)
 
     sync_site_users()
@@ -905,8 +1218,7 @@ def do_sync():
 
     if not gids:
         # When not syncing groups
-        for pid in pids:
-            sync_project(pid)
+        sync_projects((pid, None) for pid in pids)
 
     # Write the final STATE
     # This fixes syncing using groups, which don't emit a STATE message
@@ -930,6 +1242,38 @@ def main_impl():
     CONFIG['fetch_pipelines_extended'] = truthy(CONFIG['fetch_pipelines_extended'])
     CONFIG['fetch_group_variables'] = truthy(CONFIG['fetch_group_variables'])
     CONFIG['fetch_project_variables'] = truthy(CONFIG['fetch_project_variables'])
+    CONFIG['page_concurrency'] = max(int(CONFIG['page_concurrency']), 1)
+    PAGE_CONCURRENCY.reset(CONFIG['page_concurrency'])
+    CONFIG['stream_concurrency'] = max(int(CONFIG['stream_concurrency']), 1)
+    CONFIG['project_concurrency'] = max(int(CONFIG['project_concurrency']), 1)
+    CONFIG['labels_per_page'] = min(max(int(CONFIG['labels_per_page']), 1), PER_PAGE_MAX)
+    if CONFIG['requests_per_minute']:
+        CONFIG['requests_per_minute'] = float(CONFIG['requests_per_minute'])
+    RATE_LIMITER.reset(CONFIG['requests_per_minute'])
+
+    # Keep-alive connections are pooled per host, so every request after the
+    #  first one reuses an already established TLS connection. Every
+    #  concurrently synced stream can have the pages of a stream and of one of
+    #  its per-row child streams in flight, so the pool is sized to keep a
+    #  connection alive for each of those requests
+    adapter = HTTPAdapter(pool_connections=4,
+                          pool_maxsize=max(2 * CONFIG['project_concurrency']
+                                           * CONFIG['stream_concurrency']
+                                           * CONFIG['page_concurrency'],
+                                           DEFAULT_POOLSIZE))
+    SESSION.mount('https://', adapter)
+    SESSION.mount('http://', adapter)
+
+    # The headers are the same for every request, so they are set once on the
+    #  shared session instead of being passed with each call
+    SESSION.headers['Private-Token'] = CONFIG['private_token']
+    if 'user_agent' in CONFIG:
+        SESSION.headers['User-Agent'] = CONFIG['user_agent']
+
+    global STDOUT
+    sys.stdout.flush()
+    STDOUT = io.BufferedWriter(sys.stdout.buffer, buffer_size=STDOUT_BUFFER_SIZE)
+    singer.messages.write_message = write_message
 
     if '/api/' not in CONFIG['api_url']:
         CONFIG['api_url'] += '/api/v4'
@@ -957,6 +1301,10 @@ def main():
     except Exception as exc:
         LOGGER.critical(exc)
         raise exc
+    finally:
+        if STDOUT is not None:
+            STDOUT.flush()
+        SESSION.close()
 
 
 if __name__ == '__main__':
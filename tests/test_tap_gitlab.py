@@ -0,0 +1,185 @@
+import datetime
+import unittest
+from unittest import mock
+
+from singer import utils
+
+import tap_gitlab
+
+
+class FakeClock:
+    """
+    Stands in for time.monotonic and time.sleep, recording every sleep
+    instead of waiting
+    """
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+
+
+class TestRateLimiter(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = mock.patch.multiple(tap_gitlab.time,
+                                      monotonic=self.clock.monotonic,
+                                      sleep=self.clock.sleep)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_unlimited_when_requests_per_minute_is_unset(self):
+        limiter = tap_gitlab.RateLimiter(None)
+        for _ in range(100):
+            limiter.acquire()
+        self.assertEqual(self.clock.sleeps, [])
+
+    def test_burst_of_one_second_worth_of_requests(self):
+        limiter = tap_gitlab.RateLimiter(300)
+        for _ in range(5):
+            limiter.acquire()
+        self.assertEqual(self.clock.sleeps, [])
+
+    def test_missing_tokens_are_reserved_ahead(self):
+        limiter = tap_gitlab.RateLimiter(60)
+        limiter.acquire()
+        limiter.acquire()
+        limiter.acquire()
+        # The second and third requests wait for the next two tokens
+        self.assertEqual(self.clock.sleeps, [1.0, 2.0])
+
+    def test_tokens_refill_over_time(self):
+        limiter = tap_gitlab.RateLimiter(60)
+        limiter.acquire()
+        self.clock.now += 1
+        limiter.acquire()
+        self.assertEqual(self.clock.sleeps, [])
+
+    def test_tokens_do_not_accumulate_beyond_capacity(self):
+        limiter = tap_gitlab.RateLimiter(60)
+        self.clock.now += 3600
+        limiter.acquire()
+        limiter.acquire()
+        self.assertEqual(self.clock.sleeps, [1.0])
+
+    def test_pause_holds_back_acquire(self):
+        limiter = tap_gitlab.RateLimiter(None)
+        limiter.pause(30)
+        self.clock.now += 10
+        limiter.acquire()
+        self.assertEqual(self.clock.sleeps, [20.0])
+
+    def test_pause_keeps_the_latest_deadline(self):
+        limiter = tap_gitlab.RateLimiter(None)
+        limiter.pause(30)
+        limiter.pause(5)
+        limiter.acquire()
+        self.assertEqual(self.clock.sleeps, [30.0])
+
+    def test_pause_overrides_a_shorter_token_wait(self):
+        limiter = tap_gitlab.RateLimiter(60)
+        limiter.acquire()
+        limiter.pause(10)
+        limiter.acquire()
+        self.assertEqual(self.clock.sleeps, [10.0])
+
+    def test_acquire_after_pause_expired(self):
+        limiter = tap_gitlab.RateLimiter(None)
+        limiter.pause(30)
+        self.clock.now += 31
+        limiter.acquire()
+        self.assertEqual(self.clock.sleeps, [])
+
+
+class TestPageConcurrency(unittest.TestCase):
+
+    def test_starts_at_maximum(self):
+        concurrency = tap_gitlab.PageConcurrency(8)
+        self.assertEqual(concurrency.limit, 8)
+
+    def test_decrease_halves_down_to_one(self):
+        concurrency = tap_gitlab.PageConcurrency(8)
+        limits = []
+        for _ in range(5):
+            concurrency.decrease()
+            limits.append(concurrency.limit)
+        self.assertEqual(limits, [4, 2, 1, 1, 1])
+
+    def test_increase_grows_back_additively(self):
+        concurrency = tap_gitlab.PageConcurrency(8)
+        for _ in range(3):
+            concurrency.decrease()
+
+        # Every successful request adds 1 / limit, so about one more page
+        #  for every window of `limit` successful requests
+        limits = []
+        for _ in range(7):
+            concurrency.increase()
+            limits.append(concurrency.limit)
+        self.assertEqual(limits, [2, 2, 2, 3, 3, 3, 4])
+
+    def test_increase_stops_at_maximum(self):
+        concurrency = tap_gitlab.PageConcurrency(8)
+        concurrency.decrease()
+        for _ in range(100):
+            concurrency.increase()
+        self.assertEqual(concurrency.limit, 8)
+
+    def test_reset(self):
+        concurrency = tap_gitlab.PageConcurrency(8)
+        concurrency.decrease()
+        concurrency.reset(2)
+        self.assertEqual(concurrency.limit, 2)
+        concurrency.increase()
+        self.assertEqual(concurrency.limit, 2)
+
+
+class TestFormatTimestamp(unittest.TestCase):
+
+    SCHEMA = {'type': ['null', 'string'], 'format': 'date-time'}
+
+    def assert_same_as_parsed(self, value):
+        expected = utils.strftime(
+            tap_gitlab.parse_datetime(value).astimezone(datetime.timezone.utc))
+        self.assertEqual(tap_gitlab.format_timestamp(value, 'string', self.SCHEMA), expected)
+
+    def test_utc_inputs_match_parsed_timestamps(self):
+        for value in (
+                '2020-02-28T13:05:59Z',
+                '2020-02-28T13:05:59+00:00',
+                '2020-02-28T13:05:59-00:00',
+                '2020-02-28T13:05:59.1Z',
+                '2020-02-28T13:05:59.123Z',
+                '2020-02-28T13:05:59.123456Z',
+                '2020-02-28T13:05:59.120+00:00',
+                '2020-02-28T13:05:59.000Z',
+        ):
+            with self.subTest(value=value):
+                self.assertIsNotNone(tap_gitlab.UTC_DATETIME_REGEX.match(value))
+                self.assert_same_as_parsed(value)
+
+    def test_other_inputs_are_parsed(self):
+        for value in (
+                '2020-02-28T13:05:59.123+02:00',
+                '2020-02-28T13:05:59-05:30',
+                '2020-02-28T13:05:59',
+                '2020-02-28',
+        ):
+            with self.subTest(value=value):
+                self.assertIsNone(tap_gitlab.UTC_DATETIME_REGEX.match(value))
+                self.assert_same_as_parsed(value)
+
+    def test_other_values_are_left_as_they_are(self):
+        self.assertIsNone(tap_gitlab.format_timestamp(None, 'string', self.SCHEMA))
+        self.assertEqual(tap_gitlab.format_timestamp('abc', 'string', {}), 'abc')
+        self.assertEqual(tap_gitlab.format_timestamp(5, 'integer', self.SCHEMA), 5)
+
+
+if __name__ == '__main__':
+    unittest.main()